@@ -6,8 +6,28 @@ import json
 import os
 import shutil
 import streamlit as st
+from functools import lru_cache
 from typing import Dict, Any, Optional
 
+try:  # orjson is an optional accelerator; stdlib json is the fallback
+    import orjson as _orjson
+except ImportError:
+    _orjson = None
+
+def _read_json_file(path: str) -> Dict[str, Any]:
+    """Read a JSON file using orjson when available (faster C parser)."""
+    with open(path, 'rb') as f:
+        return _orjson.loads(f.read()) if _orjson else json.load(f)
+
+@lru_cache(maxsize=8)
+def _read_json_file_cached(path: str, mtime: float) -> Dict[str, Any]:
+    """Memoized JSON read; mtime participates in the key so file edits
+    (or save_ai_config) invalidate the cached entry automatically.
+
+    Callers must treat the returned dict as read-only.
+    """
+    return _read_json_file(path)
+
 def load_ai_config(config_path: str = "ai_config.json") -> Dict[str, Any]:
     """
     Load AI configuration from JSON file.
@@ -21,8 +41,7 @@ def load_ai_config(config_path: str = "ai_config.json") -> Dict[str, Any]:
     """
     try:
         if os.path.exists(config_path):
-            with open(config_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return _read_json_file_cached(config_path, os.path.getmtime(config_path))
         else:
             # Try to copy from template file
             template_path = config_path + ".sample"
@@ -30,8 +49,7 @@ def load_ai_config(config_path: str = "ai_config.json") -> Dict[str, Any]:
                 try:
                     shutil.copy2(template_path, config_path)
                     st.success(f"✅ Created {config_path} from template file.")
-                    with open(config_path, 'r', encoding='utf-8') as f:
-                        return json.load(f)
+                    return _read_json_file(config_path)
                 except Exception as copy_error:
                     st.warning(f"Could not copy template file: {copy_error}. Using default configuration.")
             else:
@@ -55,8 +73,9 @@ def get_default_ai_config() -> Dict[str, Any]:
     # Load from template file
     if os.path.exists(template_path):
         try:
-            with open(template_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            # The template rarely changes; serve repeat lookups (e.g. the
+            # get_system_prompt fallback on every rerun) from the mtime cache.
+            return _read_json_file_cached(template_path, os.path.getmtime(template_path))
         except Exception as e:
             st.error(f"Error loading template file {template_path}: {e}")
             return {}
@@ -109,8 +128,12 @@ def save_ai_config(config: Dict[str, Any], config_path: str = "ai_config.json")
         True if successful, False otherwise
     """
     try:
-        with open(config_path, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
+        if _orjson:
+            with open(config_path, 'wb') as f:
+                f.write(_orjson.dumps(config, option=_orjson.OPT_INDENT_2))
+        else:
+            with open(config_path, 'w', encoding='utf-8') as f:
+                json.dump(config, f, indent=2, ensure_ascii=False)
         return True
     except Exception as e:
         st.error(f"Error saving AI config: {e}")
@@ -1,20 +1,35 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import requests
 from datetime import datetime, date, timedelta, timezone
 import altair as alt
 import os
 import shutil
-from calendar_store import update_event_store, load_cached_events, expand_event_occurrences
-from ics import Calendar
+from calendar_store import (
+    ICSScanner,
+    update_event_store,
+    load_cached_events,
+    expand_event_occurrences,
+    conditional_request_headers,
+    save_cache_meta,
+)
 import calendar
+import functools
 import json
+import re
 import colorsys
 from urllib.parse import urlparse
 import tzlocal
 import threading
 import time
-from utils import select_month_range
+from concurrent.futures import ThreadPoolExecutor
+from utils import select_month_range, filter_date_range, WEEKDAY_NAMES, HTTP_SESSION
+
+try:  # orjson is an optional accelerator; stdlib json is the fallback
+    import orjson as _orjson
+except ImportError:
+    _orjson = None
 
 # Streamlit UI
 st.set_page_config(page_title="CalendarTimeTracker", layout="wide")
@@ -38,7 +53,7 @@ def get_latest_github_version():
     """Fetch the latest version from GitHub's version.txt file"""
     try:
         url = "https://raw.githubusercontent.com/ramhee98/CalendarTimeTracker/main/version.txt"
-        response = requests.get(url, timeout=10)
+        response = HTTP_SESSION.get(url, timeout=10)
         if response.status_code == 200:
             return response.text.strip()
         else:
@@ -68,6 +83,7 @@ def is_update_available(current, latest):
     except Exception:
         return False
 
+@functools.lru_cache(maxsize=None)
 def random_distinct_color(index, total_colors):
     hue = (index / total_colors)  # Distribute hues evenly (0 to 1)
     saturation = 0.7  # Maintain vivid colors
@@ -79,61 +95,81 @@ def random_distinct_color(index, total_colors):
 def _fetch_and_parse_ics(url, calendar_name):
     """Core function to fetch and parse ICS - no Streamlit dependencies."""
     try:
-        # Fetch .ics content
+        # Stream .ics content line-by-line straight into the scanner, so the
+        # full payload is never held in memory and download overlaps parsing.
         parsed_url = urlparse(url)
+        scanner = ICSScanner()
         # Check if it's a local file URL
         if parsed_url.scheme == "file":
-            path = parsed_url.path
-            with open(path, "r", encoding="utf-8") as f:
-                content = f.read()
+            with open(parsed_url.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    scanner.feed(line)
         else:
-            response = requests.get(url)
-            if response.status_code != 200:
-                return []
-            content = response.text
-
-        # Extract calendar name from raw text if not set by calendars file
-        if calendar_name == "Unnamed":
-            for line in content.splitlines():
-                if line.startswith("X-WR-CALNAME:"):
-                    calendar_name = line.replace("X-WR-CALNAME:", "").strip()
-                    break
-
-        # Parse using ics
-        cal = Calendar(content)
-        events = []
-        for event in cal.events:
+            # Conditional GET: if the server still has the same ETag /
+            # Last-Modified, skip download + reparse and serve the disk cache.
+            headers = conditional_request_headers(url)
+            with HTTP_SESSION.get(url, stream=True, timeout=30, headers=headers) as response:
+                if response.status_code == 304:
+                    return load_cached_events(url)
+                if response.status_code != 200:
+                    return pd.DataFrame()
+                response_headers = response.headers
+                # Raw bytes: the scanner only decodes lines it actually wants
+                for line in response.iter_lines():
+                    scanner.feed_bytes(line)
+            save_cache_meta(url, response_headers)
+        scanner.close()
+
+        # Calendar name from X-WR-CALNAME if not set by calendars file
+        if calendar_name == "Unnamed" and scanner.calendar_name:
+            calendar_name = scanner.calendar_name
+
+        rows = []
+        for vevent in scanner.events:
             try:
-                name = event.name or "Untitled Event"  # Add event name
+                name = vevent["name"] or "Untitled Event"  # Add event name
                 # Expand recurring events into individual occurrences.
-                for start, end, occ_uid in expand_event_occurrences(event):
-                    duration = (end - start).total_seconds() / 3600
-                    events.append({
-                        "calendar": calendar_name,
-                        "event_name": name,  # Add event name
-                        "start": start,
-                        "end": end,
-                        "duration_hours": duration,
-                        "uid": occ_uid
-                    })
+                for start, end, occ_uid in expand_event_occurrences(vevent):
+                    rows.append((calendar_name, name, start, end, occ_uid))
             except Exception as e:
                 print(f"Skipping event: {e}")
                 continue
 
-        new_df = pd.DataFrame(events)
-        combined_df = update_event_store(url, new_df)
-        return combined_df.to_dict("records")
+        new_df = pd.DataFrame.from_records(
+            rows,
+            columns=["calendar", "event_name", "start", "end", "uid"],
+        )
+        if not new_df.empty:
+            # One vectorized pass instead of a per-event timedelta in the loop
+            new_df["start"] = pd.to_datetime(new_df["start"], utc=True)
+            new_df["end"] = pd.to_datetime(new_df["end"], utc=True)
+            new_df.insert(
+                4,
+                "duration_hours",
+                ((new_df["end"] - new_df["start"]).dt.total_seconds() / 3600).astype("float32"),
+            )
+        # Store merge happens in the callers after fetching, keeping this
+        # function (and the worker threads running it) network/parse-only.
+        return new_df
 
     except Exception as e:
         print(f"Error loading {url}: {e}")
-        return []
+        return pd.DataFrame()
 
 @st.cache_data(ttl=86400, show_spinner=False)  # Cache for 24 hours, spinner handled manually
 def parse_ics_from_url(url, calendar_name):
     """Streamlit-cached wrapper for fetching and parsing ICS."""
     return _fetch_and_parse_ics(url, calendar_name)
 
-def load_calendar_urls(calendars_json_file="calendars.json", txt_file="calendars.txt"):
+# One pass over calendars.txt: a compiled multi-line pattern captures the
+# URL and optional "# name" suffix per entry, skipping blanks and comments.
+_CALENDAR_LINE_RE = re.compile(
+    r"^[ \t]*(?P<url>[^#\s][^#\n]*?)[ \t]*(?:#[ \t]*(?P<name>[^#\n]*?)[ \t]*(?:#[^\n]*)?)?$",
+    re.MULTILINE,
+)
+
+@st.cache_data(show_spinner=False)
+def _load_calendar_urls_cached(calendars_json_file, txt_file, json_mtime, txt_mtime):
     try:
         category_colors = {}  # To keep track of category colors
         calendar_colors = {}  # To store colors from JSON for calendars
@@ -141,8 +177,8 @@ def load_calendar_urls(calendars_json_file="calendars.json", txt_file="calendars
         # Try loading the JSON calendar file first
         if os.path.exists(calendars_json_file):
             filetype = calendars_json_file
-            with open(calendars_json_file, 'r') as file:
-                calendar_data = json.load(file)
+            with open(calendars_json_file, 'rb') as file:
+                calendar_data = _orjson.loads(file.read()) if _orjson else json.load(file)
             calendars = []
             distinct_color_index = 0
             total_calendars = len(calendar_data['calendars'])
@@ -184,21 +220,18 @@ def load_calendar_urls(calendars_json_file="calendars.json", txt_file="calendars
             filetype = txt_file
             calendars = []
             with open(txt_file, "r", encoding="utf-8") as f:
-                total_colors = sum(1 for line in f if line.strip() and not line.startswith("#"))  # Count total calendars
-                f.seek(0)  # Reset file pointer to the beginning
-                for index, line in enumerate(f):
-                    line = line.strip()
-                    if line and not line.startswith("#"):
-                        parts = line.split("#")
-                        url = parts[0].strip()
-                        custom_name = parts[1].strip() if len(parts) > 1 and parts[1].strip() else "Unnamed"
-                        category = custom_name  # Use custom_name as category for .txt
+                entries = _CALENDAR_LINE_RE.finditer(f.read())
+            entries = [(m.group("url"), m.group("name")) for m in entries]
+            total_colors = len(entries)  # Count total calendars
+            for index, (url, name) in enumerate(entries):
+                custom_name = name if name else "Unnamed"
+                category = custom_name  # Use custom_name as category for .txt
 
-                        # Assign color to category if not already assigned
-                        if category not in category_colors:
-                            category_colors[category] = random_distinct_color(index, total_colors)
+                # Assign color to category if not already assigned
+                if category not in category_colors:
+                    category_colors[category] = random_distinct_color(index, total_colors)
 
-                        calendars.append({"url": url, "custom_name": custom_name, "category": category, "color": category_colors[category]})
+                calendars.append({"url": url, "custom_name": custom_name, "category": category, "color": category_colors[category]})
             return calendars, "txt"
 
         return None, None
@@ -207,29 +240,48 @@ def load_calendar_urls(calendars_json_file="calendars.json", txt_file="calendars
         st.error(f"An error occurred while loading calendar config {filetype}: {e}")
         return None, None
 
+def load_calendar_urls(calendars_json_file="calendars.json", txt_file="calendars.txt"):
+    """Cached front for the config parse, keyed on file mtimes.
+
+    Every widget interaction reruns the script and lands here; re-reading
+    and re-parsing the config only matters when a file actually changed.
+    Caching also keeps the generated fallback colors stable across reruns.
+    """
+    json_mtime = os.path.getmtime(calendars_json_file) if os.path.exists(calendars_json_file) else None
+    txt_mtime = os.path.getmtime(txt_file) if os.path.exists(txt_file) else None
+    return _load_calendar_urls_cached(calendars_json_file, txt_file, json_mtime, txt_mtime)
+
 def load_all_events_from_cache():
-    """Load events from local CSV cache only (instant, no network requests)."""
+    """Load events from the local event cache only (instant, no network requests)."""
     try:
         calendar_data, source_type = load_calendar_urls()
         if not calendar_data:
             return None, None
 
-        all_events = []
-        for calendar_info in calendar_data:
-            url = calendar_info["url"]
+        # Read all per-URL stores concurrently; the pyarrow parquet reader
+        # releases the GIL, so threads overlap both disk I/O and decode.
+        with ThreadPoolExecutor(max_workers=min(8, len(calendar_data))) as executor:
+            cached = list(executor.map(
+                lambda info: load_cached_events(info["url"]),
+                calendar_data,
+            ))
+
+        frames = []
+        for calendar_info, cached_df in zip(calendar_data, cached):
             custom_name = calendar_info["custom_name"]
             category = calendar_info["category"]
             color = calendar_info["color"]
-            
-            # Load from local CSV cache (no URL fetching)
-            cached_df = load_cached_events(url)
+
             if not cached_df.empty:
+                cached_df = cached_df.drop(columns="uid", errors="ignore")
                 cached_df["category"] = category
                 cached_df["calendar_name"] = custom_name
                 cached_df["color"] = color
-                all_events.extend(cached_df.to_dict("records"))
+                frames.append(cached_df)
 
-        return all_events if all_events else None, source_type
+        if not frames:
+            return None, source_type
+        return pd.concat(frames, ignore_index=True), source_type
     except Exception as e:
         st.error(f"An error occurred while loading cached events: {e}")
         return None, None
@@ -240,20 +292,34 @@ def load_all_events():
         if not calendar_data:
             return None, None
 
-        all_events = []
-        for calendar_info in calendar_data:
-            url = calendar_info["url"]
-            custom_name = calendar_info["custom_name"]
-            category = calendar_info["category"] # Ensure category is always taken from calendar_data
-            color = calendar_info["color"]
-            events = parse_ics_from_url(url, custom_name)
-            for event in events:
-                event["category"] = category
-                event["calendar_name"] = custom_name
-                event["color"] = color  # Add color to each event
-            all_events.extend(events)
-
-        return all_events, source_type
+        # Fetch all calendars concurrently; each fetch is network-bound, so
+        # total wall time drops to roughly the slowest feed instead of the sum.
+        with ThreadPoolExecutor(max_workers=min(8, len(calendar_data))) as executor:
+            results = list(executor.map(
+                lambda info: parse_ics_from_url(info["url"], info["custom_name"]),
+                calendar_data,
+            ))
+
+        frames = []
+        for calendar_info, events_df in zip(calendar_data, results):
+            # Batched store merge: the read-modify-write of the disk cache
+            # runs here, once per calendar after the concurrent network
+            # phase, instead of inside each worker thread. The merge is
+            # idempotent, so re-merging cache-served results is safe.
+            combined_df = update_event_store(calendar_info["url"], events_df)
+            if combined_df.empty:
+                continue
+            # uid's job ends with the store merge; dropping it here also
+            # serves as the copy we need before attaching metadata columns.
+            combined_df = combined_df.drop(columns="uid", errors="ignore")
+            combined_df["category"] = calendar_info["category"] # Ensure category is always taken from calendar_data
+            combined_df["calendar_name"] = calendar_info["custom_name"]
+            combined_df["color"] = calendar_info["color"]  # Add color to each event
+            frames.append(combined_df)
+
+        if not frames:
+            return None, source_type
+        return pd.concat(frames, ignore_index=True), source_type
     except Exception as e:
         st.error(f"An error occurred while loading events: {e}")
         return None, None
@@ -268,8 +334,8 @@ def _load_calendar_urls_no_streamlit(calendars_json_file="calendars.json", txt_f
     """Load calendar URLs without Streamlit dependencies (for background thread)."""
     try:
         if os.path.exists(calendars_json_file):
-            with open(calendars_json_file, 'r') as file:
-                calendar_data = json.load(file)
+            with open(calendars_json_file, 'rb') as file:
+                calendar_data = _orjson.loads(file.read()) if _orjson else json.load(file)
             return [(c["url"], c.get("custom_name", "") or "Unnamed") for c in calendar_data['calendars']]
         elif os.path.exists(txt_file):
             calendars = []
@@ -294,7 +360,8 @@ def _refresh_calendar_cache_once():
         # Fetch calendars and update local CSV cache (bypasses Streamlit cache)
         calendars = _load_calendar_urls_no_streamlit()
         for url, custom_name in calendars:
-            _fetch_and_parse_ics(url, custom_name)  # Updates local CSV cache
+            events_df = _fetch_and_parse_ics(url, custom_name)
+            update_event_store(url, events_df)  # Updates the local event cache
         # Clear Streamlit cache so next user request gets fresh data
         parse_ics_from_url.clear()
         print(f"[CalendarTimeTracker] Auto-refresh completed at {datetime.now()}")
@@ -331,18 +398,32 @@ def start_background_refresher_once():
 start_background_refresher_once()
 
 
+@functools.lru_cache(maxsize=1)
+def _local_timezone():
+    """Resolve the host timezone once; get_localzone can hit the filesystem."""
+    return tzlocal.get_localzone()
+
+
 def normalize_time(df, start_col="start", end_col="end", tz="local"):
-    df[start_col] = pd.to_datetime(df[start_col], errors="coerce")
-    df[end_col] = pd.to_datetime(df[end_col], errors="coerce")
+    # Skip the parse when the columns are already datetime64 (e.g. events that
+    # came from the CSV cache); to_datetime would re-walk every value anyway.
+    if not pd.api.types.is_datetime64_any_dtype(df[start_col]):
+        df[start_col] = pd.to_datetime(df[start_col], errors="coerce")
+    if not pd.api.types.is_datetime64_any_dtype(df[end_col]):
+        df[end_col] = pd.to_datetime(df[end_col], errors="coerce")
 
     if tz == "utc":
         df[start_col] = df[start_col].dt.tz_convert("UTC")
         df[end_col] = df[end_col].dt.tz_convert("UTC")
     elif tz == "naive":
-        df[start_col] = df[start_col].dt.tz_localize(None)
-        df[end_col] = df[end_col].dt.tz_localize(None)
+        # tz_localize(None) raises on already-naive columns; only strip when
+        # there is a timezone to strip.
+        if df[start_col].dt.tz is not None:
+            df[start_col] = df[start_col].dt.tz_localize(None)
+        if df[end_col].dt.tz is not None:
+            df[end_col] = df[end_col].dt.tz_localize(None)
     elif tz == "local":
-        local_tz = tzlocal.get_localzone()
+        local_tz = _local_timezone()
         df[start_col] = df[start_col].dt.tz_convert(local_tz)
         df[end_col] = df[end_col].dt.tz_convert(local_tz)
     return df
@@ -352,143 +433,191 @@ def normalize_calendar_name(name):
         return name.replace("[Imported] ", "").strip()
     return name.strip()
 
-def preprocess_dataframe(all_events, normalize_calendar_name, normalize_time, select_month_range):
-    df = pd.DataFrame(all_events)
-    df["calendar"] = df["calendar_name"].apply(normalize_calendar_name)
+def normalize_calendar_names(series):
+    """Vectorized normalize_calendar_name for a whole Series (no Python loop)."""
+    return series.str.removeprefix("[Imported] ").str.strip()
+
+def preprocess_dataframe(events_df, normalize_calendar_name, normalize_time, select_month_range):
+    # The loaders build a fresh frame on every call, so mutating it here is
+    # safe and avoids an N-row defensive copy; the date filter below produces
+    # the only new frame this function allocates.
+    df = events_df
+    df["calendar"] = normalize_calendar_names(df["calendar_name"])
     # Normalize time BEFORE filtering
     df = normalize_time(df, tz="local")  # or tz="utc"
     # Filter by date range
     start_date, end_date = select_month_range(df)
-    # Update day/week/month distribution calculations to handle multi-day events properly
-    # For filtering, we use a more inclusive approach to catch all events that span the date range
-    df = df[
-        ((df["start"].dt.date >= start_date) & (df["start"].dt.date <= end_date)) |  # Events that start in range
-        ((df["end"].dt.date >= start_date) & (df["end"].dt.date <= end_date)) |      # Events that end in range
-        ((df["start"].dt.date <= start_date) & (df["end"].dt.date >= end_date))      # Events that span the entire range
-    ]
-    df["month"] = df["start"].dt.to_period("M")
-    df["weekday"] = df["start"].dt.day_name()
-    df["hour"] = df["start"].dt.hour
+    # Inclusive overlap filter (events that start in, end in, or span the
+    # range) computed on datetime64 boundaries instead of .dt.date objects.
+    df = filter_date_range(df, start_date, end_date)
+    if df.empty:
+        # Nothing in range: stop before building charts against empty frames
+        # (Altair still pays full spec construction for an empty chart).
+        st.info("No events found in the selected date range.")
+        st.stop()
+    # Derive all time components from one DatetimeIndex pass; day_name()
+    # formats row-by-row, so take weekday names from int codes instead.
+    starts = pd.DatetimeIndex(df["start"])
+    # Ordered categorical straight from the int codes: groupby hashes int8
+    # codes instead of Python strings, and Mon..Sun ordering comes for free.
+    df["weekday"] = pd.Categorical.from_codes(
+        starts.dayofweek, categories=list(WEEKDAY_NAMES), ordered=True
+    )
+    df["hour"] = starts.hour.astype("int8")
+    # Low-cardinality string columns: category codes hash faster in groupby
+    # and cut the object-pointer memory by roughly the ratio of rows to
+    # distinct values (one per calendar).
+    for col in ("calendar", "calendar_name", "category", "color"):
+        df[col] = df[col].astype("category")
     return df, start_date, end_date
 
+@st.cache_data(show_spinner=False)
+def _csv_download_bytes(df):
+    """Encode a table for download once per unique content (reruns reuse it)."""
+    return df.to_csv(index=False).encode("utf-8")
+
+@st.cache_data(show_spinner=False)
+def _compute_summary_table(df, start_date, end_date):
+    """Clip events to the range and build the per-group summary table.
+
+    Cached on content, so reruns triggered by unrelated widgets (expander
+    toggles, chart zoom) reuse the aggregation instead of re-grouping.
+    """
+    # Calculate total days and weeks in the selected range
+    days_span = (end_date - start_date).days + 1
+    weeks_span = days_span / 7
+
+    # Clip each event's duration to the selected range so events that
+    # straddle the boundary (or span multiple days) only contribute the
+    # in-range portion. This keeps the table consistent with the duration
+    # charts, which already clip to the period.
+    tz = df["start"].dt.tz
+    period_start = pd.Timestamp(start_date)
+    period_end = pd.Timestamp(end_date)
+    if tz is not None:
+        period_start = period_start.tz_localize(tz, nonexistent="shift_forward", ambiguous="NaT")
+        period_end = period_end.tz_localize(tz, nonexistent="shift_forward", ambiguous="NaT")
+
+    clipped = df.copy()
+    if pd.notna(period_start) and pd.notna(period_end):
+        period_end = period_end.replace(hour=23, minute=59, second=59)
+        clipped_start = clipped["start"].clip(lower=period_start)
+        clipped_end = clipped["end"].clip(upper=period_end)
+        clipped["_in_range_hours"] = ((clipped_end - clipped_start).dt.total_seconds() / 3600).clip(lower=0)
+    else:
+        # DST edge produced an undefined boundary; fall back to full duration.
+        clipped["_in_range_hours"] = clipped["duration_hours"]
+
+    # Group and aggregate on the in-range (clipped) duration. Keep the
+    # default sort: these rows feed the summary table directly, and users
+    # expect it alphabetical (the sort is over a handful of groups, not rows).
+    summary = (
+        clipped.groupby("group", observed=True)["_in_range_hours"]
+        .agg(Total_Hours="sum", Average_Hours_Per_Event="mean", Event_Count="count")
+        .reset_index()
+    )
+
+    # Add percent share and per-day/week averages
+    summary["Percent"] = (summary["Total_Hours"] / summary["Total_Hours"].sum() * 100).round(1)
+    summary["Avg_Per_Day"] = (summary["Total_Hours"] / days_span).round(2)
+    summary["Avg_Per_Week"] = (summary["Total_Hours"] / weeks_span).round(2)
+
+    # Reorder columns
+    summary = summary[[
+        "group",
+        "Percent",
+        "Total_Hours",
+        "Average_Hours_Per_Event",
+        "Avg_Per_Day",
+        "Avg_Per_Week",
+        "Event_Count"
+    ]]
+    summary.rename(columns={"group": "Group"}, inplace=True)
+    return summary
+
 def show_summary_table(df, start_date, end_date):
     st.subheader("Summary Table")
     with st.expander("📋 Show Summary Table"):
         st.caption(f"Showing events from {start_date} to {end_date}")
 
-        # Calculate total days and weeks in the selected range
         days_span = (end_date - start_date).days + 1
         weeks_span = days_span / 7
-
-        # Clip each event's duration to the selected range so events that
-        # straddle the boundary (or span multiple days) only contribute the
-        # in-range portion. This keeps the table consistent with the duration
-        # charts, which already clip to the period.
-        tz = df["start"].dt.tz
-        period_start = pd.Timestamp(start_date)
-        period_end = pd.Timestamp(end_date)
-        if tz is not None:
-            period_start = period_start.tz_localize(tz, nonexistent="shift_forward", ambiguous="NaT")
-            period_end = period_end.tz_localize(tz, nonexistent="shift_forward", ambiguous="NaT")
-
-        clipped = df.copy()
-        if pd.notna(period_start) and pd.notna(period_end):
-            period_end = period_end.replace(hour=23, minute=59, second=59)
-            clipped_start = clipped["start"].clip(lower=period_start)
-            clipped_end = clipped["end"].clip(upper=period_end)
-            clipped["_in_range_hours"] = ((clipped_end - clipped_start).dt.total_seconds() / 3600).clip(lower=0)
-        else:
-            # DST edge produced an undefined boundary; fall back to full duration.
-            clipped["_in_range_hours"] = clipped["duration_hours"]
-
-        # Group and aggregate on the in-range (clipped) duration
-        summary = (
-            clipped.groupby("group")["_in_range_hours"]
-            .agg(Total_Hours="sum", Average_Hours_Per_Event="mean", Event_Count="count")
-            .reset_index()
+        summary = _compute_summary_table(
+            df[["group", "start", "end", "duration_hours"]], start_date, end_date
         )
 
-        # Add percent share and per-day/week averages
-        summary["Percent"] = (summary["Total_Hours"] / summary["Total_Hours"].sum() * 100).round(1)
-        summary["Avg_Per_Day"] = (summary["Total_Hours"] / days_span).round(2)
-        summary["Avg_Per_Week"] = (summary["Total_Hours"] / weeks_span).round(2)
-
-        # Reorder columns
-        summary = summary[[
-            "group",
-            "Percent",
-            "Total_Hours",
-            "Average_Hours_Per_Event",
-            "Avg_Per_Day",
-            "Avg_Per_Week",
-            "Event_Count"
-        ]]
-        summary.rename(columns={"group": "Group"}, inplace=True)
-
         # Show table and download button
         st.dataframe(summary)
-        csv = summary.to_csv(index=False).encode("utf-8")
+        csv = _csv_download_bytes(summary)
         st.download_button("Download Summary as CSV", csv, "summary.csv", "text/csv")
 
         # Optional caption for context
         st.caption(f"Range covers {days_span} days ≈ {weeks_span:.1f} weeks.")
 
-def show_duration_charts(df, start_date, end_date, group_mode, date_option):
-    group_label = group_mode.title()  # "Calendar" or "Category"
+@functools.lru_cache(maxsize=None)
+def _days_in_month(year, month):
+    """Memoized calendar.monthrange lookup (re-queried for every chart rerun)."""
+    return calendar.monthrange(year, month)[1]
+
+# Vectorized time proportion calculation
+def _calculate_time_proportions(df, periods_df, period_start_col, period_end_col, label_col):
+    """Calculate time proportions using vectorized operations instead of nested loops."""
+    results = []
+    tz = df['start'].dt.tz
+
+    # Localize every period boundary in one vectorized pass instead of
+    # per-row Timestamp construction through iterrows. shift_forward /
+    # NaT survive DST transitions where midnight may be ambiguous or
+    # non-existent (events near these boundaries were silently dropped
+    # before); ambiguous boundaries come back as NaT and are skipped.
+    period_starts = pd.DatetimeIndex(pd.to_datetime(periods_df[period_start_col]))
+    period_ends = pd.DatetimeIndex(pd.to_datetime(periods_df[period_end_col]))
+    # Set end of period to end of day
+    period_ends = period_ends + pd.Timedelta(hours=23, minutes=59, seconds=59)
+    if tz is not None:
+        if period_starts.tz is None:
+            period_starts = period_starts.tz_localize(
+                tz, nonexistent='shift_forward', ambiguous='NaT'
+            )
+        if period_ends.tz is None:
+            period_ends = period_ends.tz_localize(
+                tz, nonexistent='shift_forward', ambiguous='NaT'
+            )
+
+    event_starts_all = df['start']
+    event_ends_all = df['end']
+    labels = periods_df[label_col].to_numpy()
+    for period_start, period_end, label in zip(period_starts, period_ends, labels):
+        if pd.isna(period_start) or pd.isna(period_end):
+            continue
+
+        # Vectorized overlap calculation
+        event_starts = event_starts_all.clip(lower=period_start)
+        event_ends = event_ends_all.clip(upper=period_end)
+
+        # Calculate durations (only positive overlaps)
+        durations = (event_ends - event_starts).dt.total_seconds() / 3600
+
+        # Filter events with positive duration and aggregate
+        mask = durations > 0
+        if mask.any():
+            period_df = df.loc[mask, ['group']].copy()
+            period_df['duration_hours'] = durations[mask]
+            period_df['time_label'] = label
+            results.append(period_df)
+    
+    if results:
+        return pd.concat(results, ignore_index=True)
+    return pd.DataFrame()
 
-    # Create a color mapping based on the selected group
-    color_mapping = df.groupby('group')['color'].first().to_dict()
-
-    # Vectorized time proportion calculation
-    def calculate_time_proportions_vectorized(df, periods_df, period_start_col, period_end_col, label_col):
-        """Calculate time proportions using vectorized operations instead of nested loops."""
-        results = []
-        tz = df['start'].dt.tz
-        
-        for _, period in periods_df.iterrows():
-            period_start = pd.Timestamp(period[period_start_col])
-            period_end = pd.Timestamp(period[period_end_col])
-            
-            # Make timezone aware if needed. Use shift_forward / NaT to survive
-            # DST transitions where midnight may be ambiguous or non-existent
-            # (events near these boundaries were silently dropped before).
-            if tz is not None:
-                if period_start.tz is None:
-                    period_start = period_start.tz_localize(
-                        tz, nonexistent='shift_forward', ambiguous='NaT'
-                    )
-                if period_end.tz is None:
-                    period_end = period_end.tz_localize(
-                        tz, nonexistent='shift_forward', ambiguous='NaT'
-                    )
-                # If localization produced NaT (ambiguous DST midnight), skip
-                # this period rather than crashing on the comparison below.
-                if pd.isna(period_start) or pd.isna(period_end):
-                    continue
-            
-            # Set end of period to end of day
-            period_end = period_end.replace(hour=23, minute=59, second=59)
-            
-            # Vectorized overlap calculation
-            event_starts = df['start'].clip(lower=period_start)
-            event_ends = df['end'].clip(upper=period_end)
-            
-            # Calculate durations (only positive overlaps)
-            durations = (event_ends - event_starts).dt.total_seconds() / 3600
-            durations = durations.clip(lower=0)
-            
-            # Filter events with positive duration and aggregate
-            mask = durations > 0
-            if mask.any():
-                period_df = df.loc[mask, ['group']].copy()
-                period_df['duration_hours'] = durations[mask]
-                period_df['time_label'] = period[label_col]
-                results.append(period_df)
-        
-        if results:
-            return pd.concat(results, ignore_index=True)
-        return pd.DataFrame()
+@st.cache_data(show_spinner=False)
+def _compute_time_aggregation(df, start_date, end_date, date_option):
+    """Aggregate clipped per-period/per-group hours plus percent shares.
 
+    Cached on input content: reruns caused by widgets that leave the
+    filtered frame and range untouched reuse the result instead of
+    re-running the period expansion and pivot.
+    """
     # Create time-based data frames based on the selected date_option
     time_aggregation = pd.DataFrame()
 
@@ -515,7 +644,7 @@ def show_duration_charts(df, start_date, end_date, group_mode, date_option):
             current_date += timedelta(days=7)
 
         weeks_df = pd.DataFrame(weeks)
-        time_aggregation = calculate_time_proportions_vectorized(
+        time_aggregation = _calculate_time_proportions(
             df, weeks_df, 'week_start', 'week_end', 'time_label'
         )
 
@@ -532,7 +661,7 @@ def show_duration_charts(df, start_date, end_date, group_mode, date_option):
             current_date += timedelta(days=1)
 
         days_df = pd.DataFrame(days)
-        time_aggregation = calculate_time_proportions_vectorized(
+        time_aggregation = _calculate_time_proportions(
             df, days_df, 'day_start', 'day_end', 'time_label'
         )
 
@@ -541,8 +670,8 @@ def show_duration_charts(df, start_date, end_date, group_mode, date_option):
         months = []
         current_date = date(start_date.year, start_date.month, 1)
         while current_date <= end_date:
-            month_end = date(current_date.year, current_date.month, 
-                            calendar.monthrange(current_date.year, current_date.month)[1])
+            month_end = date(current_date.year, current_date.month,
+                            _days_in_month(current_date.year, current_date.month))
             months.append({
                 'month_start': current_date,
                 'month_end': month_end,
@@ -555,79 +684,139 @@ def show_duration_charts(df, start_date, end_date, group_mode, date_option):
                 current_date = date(current_date.year, current_date.month + 1, 1)
 
         months_df = pd.DataFrame(months)
-        time_aggregation = calculate_time_proportions_vectorized(
+        time_aggregation = _calculate_time_proportions(
             df, months_df, 'month_start', 'month_end', 'time_label'
         )
 
+    if time_aggregation.empty:
+        return time_aggregation
+
+    # Single pivot pass: per-(period, group) sums and per-period totals come
+    # from one table instead of groupby.agg plus a transform("sum") repass.
+    pivot = time_aggregation.pivot_table(
+        index="time_label",
+        columns="group",
+        values="duration_hours",
+        aggfunc="sum",
+        fill_value=0.0,
+        observed=True,
+    )
+    sums = pivot.to_numpy(dtype=float)
+    totals = sums.sum(axis=1, keepdims=True)
+    percents = np.divide(sums, totals, out=np.zeros_like(sums), where=totals > 0) * 100
+    # future_stack silences the pandas 2.2 deprecation warning; with
+    # fill_value=0.0 the pivot is NaN-free, so old and new stack semantics
+    # produce the same rows and percents.ravel() stays aligned.
+    time_aggregation = pivot.stack(future_stack=True).rename("duration_hours").reset_index()
+    time_aggregation["percent"] = percents.round(1).ravel()
+    # The whole frame is serialized to Vega-Lite JSON on every rerun; float32
+    # halves the payload and the tooltips only show two decimals anyway.
+    time_aggregation["duration_hours"] = time_aggregation["duration_hours"].astype(np.float32).round(2)
+    return time_aggregation
+
+def show_duration_charts(df, start_date, end_date, group_mode, date_option, color_mapping):
+    group_label = group_mode.title()  # "Calendar" or "Category"
+
+    # Only the columns the aggregation reads participate in the cache key.
+    time_aggregation = _compute_time_aggregation(
+        df[["group", "start", "end"]], start_date, end_date, date_option
+    )
+
     if time_aggregation.empty:
         st.info(f"No data to display for the selected time range.")
         return
 
-    # Aggregate by time_label and group
-    time_aggregation = time_aggregation.groupby(['time_label', 'group']).agg(
-        duration_hours=('duration_hours', 'sum')
-    ).reset_index()
-
-    # Calculate percentages
-    time_totals = time_aggregation.groupby('time_label')["duration_hours"].transform("sum")
-    time_aggregation["percent"] = ((time_aggregation["duration_hours"] / time_totals.replace(0, pd.NA)) * 100).round(1).fillna(0)
+    # Pan/zoom listeners are costly to re-render on large specs and add little
+    # to categorical bar charts; keep them only for modest datasets.
+    interactive_charts = len(time_aggregation) < 2000
 
     time_unit = date_option.title()
 
     st.subheader(f"Relative Time per {time_unit} (100% Stacked)")
     st.caption(f"Showing events from {start_date} to {end_date}")
 
-    # Normalized chart with labeled axes, apply hex color from color_mapping
-    chart_percent = alt.Chart(time_aggregation).mark_bar().encode(
+    # Both charts share x, color and the base tooltips; deriving them from
+    # one base keeps the encodings in one place instead of two copies.
+    base = alt.Chart(time_aggregation).mark_bar().encode(
         x=alt.X(f"time_label:N", title=time_unit, axis=alt.Axis(labelAngle=-45)),
-        y=alt.Y("percent:Q", title="Percentage", stack="normalize"),
         color=alt.Color("group:N", title=group_label, scale=alt.Scale(domain=list(color_mapping.keys()), range=list(color_mapping.values()))),
+    ).properties(width=700, height=400)
+
+    # Normalized chart with labeled axes, apply hex color from color_mapping
+    chart_percent = base.encode(
+        y=alt.Y("percent:Q", title="Percentage", stack="normalize"),
         tooltip=[
             alt.Tooltip(f"time_label:N", title=time_unit),
             alt.Tooltip("group:N", title=group_label),
             alt.Tooltip("duration_hours:Q", title="Duration (hours)", format=".2f"),
             alt.Tooltip("percent:Q", title="Percentage", format=".1f")
         ]
-    ).properties(width=700, height=400).interactive()
+    )
+    if interactive_charts:
+        chart_percent = chart_percent.interactive()
 
     st.altair_chart(chart_percent, use_container_width=True)
 
     # Total duration stacked chart
     st.subheader(f"Total Time per {time_unit} (Stacked by " + group_label + ")")
     st.caption(f"Showing events from {start_date} to {end_date}")
-    chart = alt.Chart(time_aggregation).mark_bar().encode(
-        x=alt.X(f"time_label:N", title=time_unit, axis=alt.Axis(labelAngle=-45)),
+    chart = base.encode(
         y=alt.Y("duration_hours:Q", title="Hours"),
-        color=alt.Color("group:N", title=group_label, scale=alt.Scale(domain=list(color_mapping.keys()), range=list(color_mapping.values()))),
         tooltip=[
             alt.Tooltip(f"time_label:N", title=time_unit),
             alt.Tooltip("group:N", title=group_label),
             alt.Tooltip("duration_hours:Q", title="Duration (hours)", format=".2f")
         ]
-    ).properties(width=700, height=400).interactive()
+    )
+    if interactive_charts:
+        chart = chart.interactive()
 
     st.altair_chart(chart, use_container_width=True)
 
+@st.cache_data(show_spinner=False)
+def _compute_heatmap(df):
+    """Weekday × hour duration matrix; cached since it ignores group_mode
+    and date_option, which trigger most reruns."""
+    # Use the start hour and weekday for the heatmap (simplification).
+    # A fixed 7x24 accumulation via np.add.at replaces the groupby/unstack/
+    # reindex chain: one scatter-add over the int codes, and the full hour
+    # axis comes out ordered for free.
+    mat = np.zeros((7, 24))
+    np.add.at(
+        mat,
+        (df["weekday"].cat.codes.to_numpy(), df["hour"].to_numpy()),
+        df["duration_hours"].to_numpy(),
+    )
+    return pd.DataFrame(mat, index=list(WEEKDAY_NAMES), columns=range(24))
+
 def show_weekday_hour_heatmap(df, start_date, end_date):
     st.subheader("Activity Heatmap (Weekday × Hour)")
     st.caption(f"Showing events from {start_date} to {end_date}")
 
     # For multi-day events, we need to distribute their time appropriately
     # We'll create a simplified version focusing on the start hour for each event
-
-    # Use the start hour and weekday for the heatmap (simplification)
-    heatmap_data = df.groupby(["weekday", "hour"])["duration_hours"].sum().unstack(fill_value=0)
-    heatmap_data = heatmap_data.reindex(["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"])
+    heatmap_data = _compute_heatmap(df[["weekday", "hour", "duration_hours"]])
     st.dataframe(heatmap_data.style.background_gradient(cmap="YlOrRd"))
 
-def show_calendar_distribution_pie_chart(df, group_mode):
+def show_calendar_distribution_pie_chart(df, group_mode, color_mapping):
     group_label = group_mode.title()  # "Calendar" or "Category"
 
-    # Create a color mapping based on the selected group
-    color_mapping = df.groupby('group')['color'].first().to_dict()
-
-    summary = df.groupby("group")["duration_hours"].sum().reset_index()
-    total = summary["duration_hours"].sum()
+    # Few groups, many rows: a bincount over the category codes is one C
+    # reduction, skipping the groupby machinery entirely.
+    codes = df["group"].cat.codes.to_numpy()
+    categories = df["group"].cat.categories
+    valid = codes >= 0  # -1 codes are NaN groups, which groupby also drops
+    sums = np.bincount(
+        codes[valid],
+        weights=df["duration_hours"].to_numpy()[valid],
+        minlength=len(categories),
+    )
+    counts = np.bincount(codes[valid], minlength=len(categories))
+    observed = counts > 0
+    summary = pd.DataFrame(
+        {"group": categories[observed], "duration_hours": sums[observed]}
+    )
+    total = sums.sum()
     summary["percentage"] = (summary["duration_hours"] / total) * 100
 
     chart = alt.Chart(summary).mark_arc().encode(
@@ -708,7 +897,7 @@ if force_refresh:
 else:
     with st.spinner("Loading calendar data from cache..."):
         all_events, source_type = load_all_events_from_cache()
-        if not all_events:
+        if all_events is None:
             # No cache exists yet, fetch from URLs
             with st.spinner("No cache found, fetching from URLs..."):
                 all_events, source_type = load_all_events()
@@ -716,7 +905,7 @@ else:
 # Mark main app as loaded
 st.session_state.main_app_loaded = True
 
-if all_events:
+if all_events is not None:
     # Optional selector (only if JSON is used)
     if source_type == "json":
         group_mode = st.selectbox(
@@ -732,7 +921,12 @@ if all_events:
     # Process data with progress indicator
     with st.spinner("Processing and filtering calendar data..."):
         df, start_date, end_date = preprocess_dataframe(all_events, normalize_calendar_name, normalize_time, select_month_range)
-        df["group"] = df[group_mode]
+        # Categorical group column: groupby hashes small int codes instead of
+        # strings, and observed=True keeps unused categories out of results.
+        df["group"] = df[group_mode].astype("category")
+        # One scan for the group->color mapping, shared by both chart
+        # functions instead of each re-deriving it from the full frame.
+        color_mapping = df.groupby("group", observed=True, sort=False)["color"].first().to_dict()
     
     show_summary_table(df, start_date, end_date)
 
@@ -746,9 +940,9 @@ if all_events:
     
     # Show charts with progress indicator
     with st.spinner("Generating charts..."):
-        show_duration_charts(df, start_date, end_date, group_mode, date_option)
+        show_duration_charts(df, start_date, end_date, group_mode, date_option, color_mapping)
         show_weekday_hour_heatmap(df, start_date, end_date)
-        show_calendar_distribution_pie_chart(df, group_mode)
+        show_calendar_distribution_pie_chart(df, group_mode, color_mapping)
 
 else:
     st.warning("No events loaded from calendars.")
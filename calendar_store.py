@@ -1,29 +1,261 @@
 import os
 import hashlib
+import json
+import re
 import pandas as pd
+from functools import lru_cache
 from datetime import datetime, timedelta, timezone
 from dateutil.rrule import rrulestr
 from dateutil import parser as dtparser
+from dateutil.tz import gettz
 
 # Ensure event store directory exists
 os.makedirs("data", exist_ok=True)
 
+_DURATION_RE = re.compile(
+    r"(?P<sign>-)?P(?:(?P<days>\d+)D)?"
+    r"(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?"
+)
 
-def expand_event_occurrences(event, horizon_days=400, max_occurrences=10000, now=None):
-    """Expand a single ics Event into its individual occurrences.
 
-    The ``ics`` 0.7.2 library does not expand recurrence rules, so a weekly
-    meeting would otherwise be counted only once. This reads the raw RRULE
-    (and best-effort EXDATE) from ``event.extra`` and materialises each
-    occurrence using dateutil. Non-recurring events yield a single occurrence.
+def _parse_ics_datetime(value, params):
+    """Parse an iCalendar DATE or DATE-TIME value into an aware UTC datetime.
+
+    Returns ``(datetime_utc, is_all_day)``. Only the fixed forms that appear
+    in real-world feeds are handled (``YYYYMMDD``, ``YYYYMMDDTHHMMSS`` and the
+    ``Z``-suffixed UTC variant); TZID parameters are resolved via dateutil.
+    Floating times (no TZID, no Z) are treated as UTC, matching what the old
+    ics-library path did.
+    """
+    value = value.strip()
+    # The formats are fixed-width, so slice-and-int beats strptime (which
+    # re-interprets its format string on every call) by a wide margin on
+    # large calendars; malformed values fall through to strptime's error.
+    try:
+        if params.get("VALUE") == "DATE" or ("T" not in value and len(value) == 8):
+            dt = datetime(int(value[0:4]), int(value[4:6]), int(value[6:8]))
+            return dt.replace(tzinfo=timezone.utc), True
+        dt = datetime(
+            int(value[0:4]), int(value[4:6]), int(value[6:8]),
+            int(value[9:11]), int(value[11:13]), int(value[13:15]),
+        )
+    except ValueError:
+        if params.get("VALUE") == "DATE" or ("T" not in value and len(value) == 8):
+            dt = datetime.strptime(value, "%Y%m%d")
+            return dt.replace(tzinfo=timezone.utc), True
+        dt = datetime.strptime(value.rstrip("Z"), "%Y%m%dT%H%M%S")
+    if value.endswith("Z"):
+        return dt.replace(tzinfo=timezone.utc), False
+    tzid = params.get("TZID")
+    if tzid:
+        zone = gettz(tzid)
+        if zone is not None:
+            return dt.replace(tzinfo=zone).astimezone(timezone.utc), False
+    return dt.replace(tzinfo=timezone.utc), False
+
+
+def _parse_ics_duration(value):
+    """Parse an iCalendar DURATION value (e.g. ``PT1H30M``) into a timedelta."""
+    match = _DURATION_RE.fullmatch(value.strip())
+    if not match:
+        return None
+    parts = match.groupdict()
+    delta = timedelta(
+        days=int(parts["days"] or 0),
+        hours=int(parts["hours"] or 0),
+        minutes=int(parts["minutes"] or 0),
+        seconds=int(parts["seconds"] or 0),
+    )
+    return -delta if parts["sign"] else delta
+
+
+class ICSScanner:
+    """Streaming line-scan parser for iCalendar text.
+
+    Replaces ``ics.Calendar`` for the read-only fields this app actually
+    needs (DTSTART/DTEND/SUMMARY/UID plus recurrence info). Building the
+    full object graph for every VEVENT dominated parse time on large
+    calendars; a single state-machine pass over the raw lines emits plain
+    dicts instead.
+
+    Feed physical lines with :meth:`feed` and call :meth:`close` once the
+    input is exhausted. Parsed events accumulate in ``events`` and the
+    calendar's ``X-WR-CALNAME`` (if present) in ``calendar_name``.
+    """
+
+    # VEVENT properties we keep; everything else is skipped without parsing.
+    _WANTED = {"DTSTART", "DTEND", "DURATION", "SUMMARY", "UID", "RRULE", "EXDATE"}
+
+    # Byte prefixes of the lines feed_bytes() must look at; anything else is
+    # dropped before it is ever decoded. Property names are uppercase in every
+    # feed we have seen (Google/Outlook/Apple all emit uppercase per RFC 5545
+    # convention), which is what makes the raw-bytes prefix test safe.
+    _WANTED_BYTES = (
+        b"BEGIN:", b"END:", b"DTSTART", b"DTEND", b"DURATION",
+        b"SUMMARY", b"UID", b"RRULE", b"EXDATE", b"X-WR-CALNAME",
+    )
+
+    def __init__(self):
+        self.events = []
+        self.calendar_name = None
+        self._current = None  # property dict of the VEVENT being scanned
+        self._pending = None  # buffered logical line (RFC 5545 unfolding)
+        self._skip_depth = 0  # nesting depth inside a sub-component of a VEVENT
+
+    def feed(self, line):
+        """Feed one physical line of iCalendar text."""
+        if line is None:
+            return
+        if line[:1] in (" ", "\t"):
+            # Folded continuation of the previous logical line.
+            if self._pending is not None:
+                self._pending += line[1:].rstrip("\r\n")
+            return
+        pending = self._pending
+        self._pending = line.rstrip("\r\n")
+        if pending:
+            self._handle(pending)
+
+    def feed_bytes(self, line):
+        """Feed one physical line as raw bytes, decoding only wanted lines.
+
+        DESCRIPTION/LOCATION/ATTENDEE and friends usually make up most of a
+        feed's volume; the byte-prefix test discards them without paying for
+        UTF-8 decoding. Continuations of a dropped line are dropped too.
+        """
+        if not line:
+            return
+        if line[:1] in (b" ", b"\t"):
+            # Folded continuation; only decode if the base line was kept.
+            if self._pending is not None:
+                self._pending += line[1:].decode("utf-8", "replace").rstrip("\r\n")
+            return
+        pending = self._pending
+        if line.startswith(self._WANTED_BYTES):
+            self._pending = line.decode("utf-8", "replace").rstrip("\r\n")
+        else:
+            self._pending = None
+        if pending:
+            self._handle(pending)
+
+    def close(self):
+        """Flush the last buffered line; call after the final feed()."""
+        if self._pending:
+            self._handle(self._pending)
+            self._pending = None
+
+    def _handle(self, logical):
+        name_part, sep, value = logical.partition(":")
+        if not sep:
+            return
+        name, _, params_part = name_part.partition(";")
+        name = name.upper()
+
+        if name == "BEGIN":
+            if self._skip_depth:
+                self._skip_depth += 1
+            elif value.strip().upper() == "VEVENT":
+                self._current = {}
+            elif self._current is not None:
+                # Sub-component of the event (VALARM etc.): its SUMMARY/UID/
+                # DURATION must not shadow the event's own properties, so
+                # drop everything until the matching END.
+                self._skip_depth = 1
+            return
+        if name == "END":
+            if self._skip_depth:
+                self._skip_depth -= 1
+                return
+            if value.strip().upper() == "VEVENT" and self._current is not None:
+                self._finalize()
+                self._current = None
+            return
+
+        if self._skip_depth:
+            return
+        if self._current is not None:
+            if name in self._WANTED:
+                if name == "EXDATE":
+                    # EXDATE may repeat; accumulate raw values.
+                    self._current.setdefault("EXDATE", []).append(value)
+                else:
+                    self._current[name] = (value, params_part)
+        elif name == "X-WR-CALNAME":
+            self.calendar_name = value.strip()
+
+    def _finalize(self):
+        props = self._current
+        if "DTSTART" not in props:
+            return
+        try:
+            value, params_part = props["DTSTART"]
+            params = self._parse_params(params_part)
+            start, all_day = _parse_ics_datetime(value, params)
+
+            if "DTEND" in props:
+                value, params_part = props["DTEND"]
+                end, _ = _parse_ics_datetime(value, self._parse_params(params_part))
+            elif "DURATION" in props:
+                delta = _parse_ics_duration(props["DURATION"][0])
+                end = start + delta if delta is not None else start
+            elif all_day:
+                end = start + timedelta(days=1)  # DTEND is exclusive for dates
+            else:
+                end = start
+
+            exdates = set()
+            for raw in props.get("EXDATE", []):
+                for part in raw.split(","):
+                    try:
+                        exdates.add(dtparser.parse(part).date())
+                    except Exception:
+                        pass
+
+            self.events.append({
+                "name": props["SUMMARY"][0] if "SUMMARY" in props else None,
+                "start": start,
+                "end": end,
+                "uid": props["UID"][0] if "UID" in props else None,
+                "all_day": all_day,
+                "rrule": props["RRULE"][0] if "RRULE" in props else None,
+                "exdates": exdates,
+            })
+        except Exception as e:
+            print(f"Skipping unparseable VEVENT: {e}")
+
+    @staticmethod
+    def _parse_params(params_part):
+        if not params_part:
+            return {}
+        return dict(
+            p.split("=", 1) for p in params_part.split(";") if "=" in p
+        )
+
+
+def scan_ics_text(content):
+    """Run :class:`ICSScanner` over full iCalendar text and return the scanner."""
+    scanner = ICSScanner()
+    for line in content.splitlines():
+        scanner.feed(line)
+    scanner.close()
+    return scanner
+
+
+def expand_event_occurrences(vevent, horizon_days=400, max_occurrences=10000, now=None):
+    """Expand a parsed VEVENT dict into its individual occurrences.
+
+    ``vevent`` is a dict as produced by :class:`ICSScanner`. Recurrence rules
+    are materialised with dateutil (honouring best-effort EXDATE exclusions),
+    so a weekly meeting is counted once per week instead of once overall.
+    Non-recurring events yield a single occurrence.
 
     Returns a list of ``(start_utc, end_utc, uid)`` tuples. Recurring
     occurrences get a date-suffixed uid so each occurrence is a stable,
     distinct row in the CSV cache.
     """
-    start_utc = event.begin.datetime.astimezone(timezone.utc)
-    end_utc = event.end.datetime.astimezone(timezone.utc)
-    if getattr(event, "all_day", False):
+    start_utc = vevent["start"].astimezone(timezone.utc)
+    end_utc = vevent["end"].astimezone(timezone.utc)
+    if vevent.get("all_day", False):
         # All-day events arrive at UTC midnight. Converting midnight to a
         # local timezone west of UTC rolls the event onto the previous
         # calendar day. Anchor at noon UTC instead so the date is stable
@@ -31,23 +263,13 @@ def expand_event_occurrences(event, horizon_days=400, max_occurrences=10000, now
         start_utc = start_utc.replace(hour=12, minute=0, second=0, microsecond=0)
         end_utc = end_utc.replace(hour=12, minute=0, second=0, microsecond=0)
     duration = end_utc - start_utc
-    uid = event.uid
+    uid = vevent.get("uid")
 
-    rrule_line = next(
-        (c.value for c in getattr(event, "extra", []) if c.name == "RRULE"), None
-    )
+    rrule_line = vevent.get("rrule")
     if not rrule_line:
         return [(start_utc, end_utc, uid)]
 
-    # Collect EXDATE exclusions (matched by calendar date, best effort).
-    exdates = set()
-    for c in getattr(event, "extra", []):
-        if c.name == "EXDATE":
-            for part in c.value.split(","):
-                try:
-                    exdates.add(dtparser.parse(part).date())
-                except Exception:
-                    pass
+    exdates = vevent.get("exdates") or set()
 
     if now is None:
         now = datetime.now(timezone.utc)
@@ -72,25 +294,137 @@ def expand_event_occurrences(event, horizon_days=400, max_occurrences=10000, now
     return occurrences or [(start_utc, end_utc, uid)]
 
 def hash_url(url):
-    return hashlib.md5(url.encode()).hexdigest()
+    """Filename-safe digest of a calendar URL (not security sensitive)."""
+    return hashlib.blake2b(url.encode(), digest_size=16).hexdigest()
+
+@lru_cache(maxsize=64)
+def _migrate_legacy_hash_files(url):
+    """Rename cache files written under the old md5 naming scheme.
+
+    Runs once per URL per process; renames are skipped when the blake2b-named
+    file already exists so a migrated store is never clobbered.
+    """
+    old_stem = f"data/{hashlib.md5(url.encode()).hexdigest()}"
+    new_stem = f"data/{hash_url(url)}"
+    for ext in (".parquet", ".csv", ".meta.json"):
+        old_path = old_stem + ext
+        if os.path.exists(old_path) and not os.path.exists(new_stem + ext):
+            try:
+                os.replace(old_path, new_stem + ext)
+            except OSError:
+                pass
 
 def get_cache_file_path(url):
+    _migrate_legacy_hash_files(url)
+    return f"data/{hash_url(url)}.parquet"
+
+def get_legacy_cache_file_path(url):
+    """Path of the pre-parquet CSV store, kept readable for migration."""
     return f"data/{hash_url(url)}.csv"
 
+def get_cache_meta_path(url):
+    _migrate_legacy_hash_files(url)
+    return f"data/{hash_url(url)}.meta.json"
+
+def load_cache_meta(url):
+    """Load the HTTP validator metadata (ETag/Last-Modified) for a cached URL."""
+    path = get_cache_meta_path(url)
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+    return {}
+
+def save_cache_meta(url, response_headers):
+    """Persist HTTP validators so the next fetch can be a conditional GET."""
+    meta = {
+        "etag": response_headers.get("ETag"),
+        "last_modified": response_headers.get("Last-Modified"),
+        "fetched_at": datetime.now(timezone.utc).isoformat(),
+    }
+    try:
+        with open(get_cache_meta_path(url), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+    except Exception as e:
+        print(f"Could not save cache metadata for {url}: {e}")
+
+def conditional_request_headers(url):
+    """Build If-None-Match / If-Modified-Since headers from stored metadata.
+
+    Only returns validators when a usable event cache exists, so a 304 can
+    always be answered from disk.
+    """
+    paths = (get_cache_file_path(url), get_legacy_cache_file_path(url))
+    if not any(stat is not None and stat.st_size > 0
+               for stat in map(_stat_or_none, paths)):
+        return {}
+    meta = load_cache_meta(url)
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    return headers
+
+@lru_cache(maxsize=32)
+def _read_parquet_cached(path, mtime):
+    """Memoized parquet read; mtime participates in the key so a rewrite by
+    save_events_to_cache invalidates the cached entry automatically.
+
+    Callers must treat the returned frame as read-only (every consumer
+    derives copies via drop/filter/concat before modifying anything).
+    """
+    return pd.read_parquet(path)
+
+def _stat_or_none(path):
+    """os.stat result for ``path``, or None if it does not exist.
+
+    One syscall instead of the exists()+getsize() pair; these checks run for
+    every cached URL on every page load.
+    """
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
 def load_cached_events(url):
     path = get_cache_file_path(url)
-    if os.path.exists(path) and os.path.getsize(path) > 0:
+    stat = _stat_or_none(path)
+    if stat is not None and stat.st_size > 0:
         try:
-            return pd.read_csv(path, parse_dates=["start", "end"])
-        except pd.errors.EmptyDataError:
+            return _read_parquet_cached(path, stat.st_mtime_ns)
+        except Exception:
             return pd.DataFrame()  # Recover gracefully if file is corrupt or empty
+    # Fall back to the CSV store written by older versions; the next save
+    # migrates it to parquet.
+    legacy_path = get_legacy_cache_file_path(url)
+    legacy_stat = _stat_or_none(legacy_path)
+    if legacy_stat is not None and legacy_stat.st_size > 0:
+        try:
+            df = pd.read_csv(legacy_path, parse_dates=["start", "end"])
+            if "duration_hours" in df.columns:
+                # Match the float32 dtype events get at parse time, so the
+                # first load after upgrading behaves like a parquet load.
+                df["duration_hours"] = df["duration_hours"].astype("float32")
+            return df
+        except pd.errors.EmptyDataError:
+            return pd.DataFrame()
     return pd.DataFrame()
 
 def save_events_to_cache(url, df):
     if df.empty or df.columns.empty:
         return  # Prevent saving if no usable data
     path = get_cache_file_path(url)
-    df.to_csv(path, index=False)
+    df.to_parquet(path, index=False)
+    # Drop the superseded CSV so future loads don't read stale data from it.
+    legacy_path = get_legacy_cache_file_path(url)
+    if os.path.exists(legacy_path):
+        try:
+            os.remove(legacy_path)
+        except OSError:
+            pass
 
 def update_event_store(url, new_events_df, cutoff_days=30, additive=False):
     """Merge new events into the cached event store for ``url``.
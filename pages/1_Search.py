@@ -1,6 +1,6 @@
 import streamlit as st
 import re
-from utils import load_all_events, load_all_events_from_cache, normalize_calendar_name, normalize_time, select_month_range
+from utils import load_all_events, load_all_events_from_cache, normalize_calendar_names, normalize_time, select_month_range, filter_date_range
 import pandas as pd
 
 st.set_page_config(page_title="Search Events", layout="wide")
@@ -34,11 +34,11 @@ if force_refresh:
 else:
     with st.spinner("Loading calendar data from cache..."):
         all_events, source_type = load_all_events_from_cache()
-        if not all_events:
+        if all_events is None:
             with st.spinner("No cache found, fetching from URLs..."):
                 all_events, source_type = load_all_events()
 
-if not all_events:
+if all_events is None:
     st.warning("No events available.")
     st.stop()
 
@@ -46,9 +46,12 @@ if not all_events:
 st.session_state.search_loaded = True
 
 with st.spinner("Processing calendar data..."):
-    df = pd.DataFrame(all_events)
-    df["calendar"] = df["calendar_name"].apply(normalize_calendar_name)
+    df = all_events.copy()
+    df["calendar"] = normalize_calendar_names(df["calendar_name"])
     df = normalize_time(df, tz="local")
+    # Establish a start-ascending order once; the date filter below can then
+    # binary-search its upper bound instead of masking the whole frame.
+    df = df.sort_values("start", ignore_index=True)
 
 # --- View selector like app.py ---
 if source_type == "json":
@@ -62,18 +65,21 @@ if source_type == "json":
 else:
     group_mode = "calendar"
 
-df["group"] = df[group_mode]
+# Low-cardinality label columns as category dtype: the .isin filter and the
+# options lookup below then work on integer codes instead of hashing strings
+# row by row. The selected view is referenced through group_mode directly,
+# so no duplicated "group" column is needed on this page.
+for _col in ("calendar", "category"):
+    if _col in df.columns:
+        df[_col] = df[_col].astype("category")
 
 # --- Select date range ---
 with st.spinner("Applying date filters..."):
     start_date, end_date = select_month_range(df)
 
-    # Filter by date range
-    df = df[
-        ((df["start"].dt.date >= start_date) & (df["start"].dt.date <= end_date)) |
-        ((df["end"].dt.date >= start_date) & (df["end"].dt.date <= end_date)) |
-        ((df["start"].dt.date <= start_date) & (df["end"].dt.date >= end_date))
-    ]
+    # Filter by date range (df is sorted by start, so the upper bound is a
+    # searchsorted slice rather than a full boolean mask)
+    df = filter_date_range(df, start_date, end_date, assume_sorted=True)
 
 # --- Search functionality ---
 st.subheader("Search")
@@ -81,7 +87,10 @@ st.subheader("Search")
 # Get unique values for filter based on group_mode
 filter_column = group_mode  # "calendar" or "category"
 filter_label = group_mode.title()  # "Calendar" or "Category"
-available_options = sorted(df[filter_column].unique().tolist())
+# Trim categories fixed before the date filter so the multiselect only
+# offers values with events in range, matching the old unique()+sort;
+# categories stay sorted through the removal.
+available_options = df[filter_column].cat.remove_unused_categories().cat.categories.tolist()
 
 col1, col2 = st.columns([2, 1])
 with col1:
@@ -99,29 +108,47 @@ with col2:
     )
 
 if search_query:
-    # Convert wildcard pattern to regex
-    # Escape special regex characters except *, then convert * to .*
-    pattern = re.escape(search_query).replace(r'\*', '.*')
-    
-    # Filter events matching the pattern (case-insensitive)
-    # Pattern matches anywhere in the event name
-    mask = df["event_name"].str.contains(pattern, case=False, na=False, regex=True)
-    matching_events = df[mask].copy()
+    # Filter events matching the query (case-insensitive, anywhere in the
+    # event name). Plain queries take the non-regex substring path, which
+    # pandas implements as a straight C-level scan; only queries that
+    # actually use the * wildcard pay for a regex, and that regex is
+    # compiled once instead of per-row.
+    if "*" in search_query:
+        pattern = re.compile(
+            ".*".join(re.escape(part) for part in search_query.split("*")),
+            re.IGNORECASE,
+        )
+        mask = df["event_name"].str.contains(pattern, na=False)
+    else:
+        mask = df["event_name"].str.contains(search_query, case=False, na=False, regex=False)
+    # Fuse the row filter with the column projection: .loc allocates only the
+    # columns the results view needs, instead of deep-copying the full frame
+    # and projecting later.
+    matching_events = df.loc[
+        mask, ["event_name", "calendar", "category", "start", "end", "duration_hours"]
+    ]
     
-    # Apply filter if any options are selected
-    if selected_options:
+    # Apply filter only when it can exclude anything: an empty selection means
+    # "all", and selecting every option is equivalent, so both skip the
+    # per-row membership test.
+    if selected_options and len(selected_options) < len(available_options):
         matching_events = matching_events[matching_events[filter_column].isin(selected_options)]
     
     if matching_events.empty:
         filter_msg = f" in selected {filter_label.lower()}(s)" if selected_options else ""
         st.info(f"No events found matching '{search_query}'{filter_msg}")
     else:
-        # Sort by start time (most recent first)
-        matching_events = matching_events.sort_values("start", ascending=False)
+        # Most recent first: the parent frame is already sorted ascending by
+        # start, and the mask filters preserve that order, so reversing the
+        # view replaces a per-keystroke sort.
+        matching_events = matching_events.iloc[::-1]
         
-        # Calculate total time
-        total_hours = matching_events["duration_hours"].sum()
-        total_events = len(matching_events)
+        # Calculate total time on the raw ndarray; durations are computed at
+        # parse time and never NaN, so pandas' nan-aware reduction layer is
+        # pure overhead here.
+        durations = matching_events["duration_hours"].to_numpy()
+        total_hours = float(durations.sum())
+        total_events = durations.size
         
         # Display summary
         col1, col2, col3 = st.columns(3)
@@ -133,23 +160,34 @@ if search_query:
             avg_duration = total_hours / total_events if total_events > 0 else 0
             st.metric("Avg Duration", f"{avg_duration:.2f} hrs")
         
-        # Prepare display dataframe
-        display_df = matching_events[[
-            "event_name", "calendar", "category", "start", "end", "duration_hours"
-        ]].copy()
-        
-        # Format datetime columns for display
-        display_df["start"] = display_df["start"].dt.strftime("%Y-%m-%d %H:%M")
-        display_df["end"] = display_df["end"].dt.strftime("%Y-%m-%d %H:%M")
-        display_df["duration_hours"] = display_df["duration_hours"].round(2)
-        
-        # Rename columns for display
-        display_df.columns = ["Event Name", "Calendar", "Category", "Start", "End", "Duration (hrs)"]
-        
-        st.dataframe(display_df, use_container_width=True)
-        
-        # Download button for search results
-        csv = display_df.to_csv(index=False).encode("utf-8")
+        # Let the frontend format datetimes and round durations via
+        # column_config: no per-row strftime/round pass in Python, and the
+        # widget keeps real dtypes so in-table sorting stays correct.
+        st.dataframe(
+            matching_events,
+            use_container_width=True,
+            column_config={
+                "event_name": "Event Name",
+                "calendar": "Calendar",
+                "category": "Category",
+                "start": st.column_config.DatetimeColumn("Start", format="YYYY-MM-DD HH:mm"),
+                "end": st.column_config.DatetimeColumn("End", format="YYYY-MM-DD HH:mm"),
+                "duration_hours": st.column_config.NumberColumn("Duration (hrs)", format="%.2f"),
+            },
+        )
+
+        # Download button for search results; to_csv applies the same
+        # formatting in its own writer instead of pre-stringified columns.
+        csv = matching_events.rename(columns={
+            "event_name": "Event Name",
+            "calendar": "Calendar",
+            "category": "Category",
+            "start": "Start",
+            "end": "End",
+            "duration_hours": "Duration (hrs)",
+        }).to_csv(
+            index=False, date_format="%Y-%m-%d %H:%M", float_format="%.2f"
+        ).encode("utf-8")
         st.download_button(
             "Download Search Results as CSV",
             csv,
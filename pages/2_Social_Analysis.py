@@ -1,15 +1,15 @@
 import streamlit as st
 import pandas as pd
-from ics import Calendar
 from datetime import datetime, timezone, date, timedelta
-from collections import defaultdict
+from collections import Counter, defaultdict
+import functools
 import re
 import json
 import os
 import requests
 import calendar
-from calendar_store import load_cached_events, update_event_store, expand_event_occurrences
-from utils import select_month_range, normalize_time
+from calendar_store import load_cached_events, update_event_store, expand_event_occurrences, scan_ics_text
+from utils import select_month_range, normalize_time, filter_date_range
 
 st.set_page_config(page_title="Social Time Analysis", layout="wide")
 st.title("👥 Social Time Analysis")
@@ -20,6 +20,13 @@ SETTINGS_FILE = "social_analysis_settings.json"
 
 def load_settings():
     """Load settings from JSON file, validating types and filling missing keys."""
+    mtime = os.path.getmtime(SETTINGS_FILE) if os.path.exists(SETTINGS_FILE) else 0
+    return _load_settings_cached(SETTINGS_FILE, mtime)
+
+@st.cache_data
+def _load_settings_cached(settings_file, mtime):
+    """Cached settings read; the mtime key means save_settings writes are
+    picked up on the next rerun without re-parsing on every widget event."""
     default_settings = {
         "known_people": [],
         "exclude_patterns": [],
@@ -27,10 +34,10 @@ def load_settings():
         "selected_calendars": [],
         "ignore_partial_names": True
     }
-    if not os.path.exists(SETTINGS_FILE):
+    if not os.path.exists(settings_file):
         return default_settings
     try:
-        with open(SETTINGS_FILE, 'r') as f:
+        with open(settings_file, 'r') as f:
             loaded = json.load(f)
     except Exception as e:
         st.error(f"Error loading settings: {e}")
@@ -79,11 +86,18 @@ if "loaded_events" not in st.session_state:
 def load_calendar_urls(calendars_json_file="calendars.json"):
     """Load calendar configurations."""
     if os.path.exists(calendars_json_file):
-        with open(calendars_json_file, 'r') as file:
-            calendar_data = json.load(file)
-        return calendar_data.get('calendars', [])
+        return _load_calendar_urls_cached(
+            calendars_json_file, os.path.getmtime(calendars_json_file)
+        )
     return []
 
+@st.cache_data
+def _load_calendar_urls_cached(calendars_json_file, mtime):
+    """Cached calendars.json read, invalidated by mtime like the settings."""
+    with open(calendars_json_file, 'r') as file:
+        calendar_data = json.load(file)
+    return calendar_data.get('calendars', [])
+
 def load_events_from_cache(url, calendar_name):
     """Load events from local CSV cache (instant, no network)."""
     cached_df = load_cached_events(url)
@@ -103,8 +117,39 @@ def load_events_from_cache(url, calendar_name):
         })
     return events
 
+def _set_loaded_events(loaded_events):
+    """Store loaded events together with their normalized DataFrame.
+
+    Widget interactions re-execute the whole script, so keeping the converted
+    frame in session state means the list->DataFrame build and the timezone
+    normalization run once per load instead of once per rerun.
+    """
+    st.session_state.loaded_events = loaded_events
+    df = pd.DataFrame(loaded_events)
+    if not df.empty:
+        # Convert UTC timestamps to local time so date filtering, "Last Seen"
+        # and cadence match the other pages (which all normalize to local).
+        df = normalize_time(df, tz="local")
+    st.session_state.loaded_events_df = df
+
 def fetch_calendar_events(url, calendar_name):
-    """Fetch and parse events from a calendar URL and update CSV cache."""
+    """Fetch and parse events from a calendar URL and update the shared cache.
+
+    For file:// URLs the file's mtime joins the cache key so local edits
+    bust the cached parse immediately.
+    """
+    file_mtime = None
+    if url.startswith("file://"):
+        try:
+            file_mtime = os.path.getmtime(url.replace("file://", ""))
+        except OSError:
+            pass
+    return _fetch_calendar_events_cached(url, calendar_name, file_mtime)
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _fetch_calendar_events_cached(url, calendar_name, file_mtime):
+    """Cached fetch+parse: repeat loads of the same URL within the TTL skip
+    both the network round trip and the ICS parse."""
     try:
         if url.startswith("file://"):
             path = url.replace("file://", "")
@@ -116,15 +161,15 @@ def fetch_calendar_events(url, calendar_name):
                 return []
             content = response.text
         
-        cal = Calendar(content)
+        scanner = scan_ics_text(content)
         events = []
         events_for_cache = []  # For updating CSV cache
-        
-        for event in cal.events:
+
+        for vevent in scanner.events:
             try:
-                event_name = event.name or ""
+                event_name = vevent["name"] or ""
                 # Expand recurring events into individual occurrences.
-                for start, end, occ_uid in expand_event_occurrences(event):
+                for start, end, occ_uid in expand_event_occurrences(vevent):
                     duration = (end - start).total_seconds() / 3600
 
                     events.append({
@@ -171,58 +216,43 @@ def parse_person_entry(entry):
     all_names = parts  # All parts are valid names to match
     return primary, all_names
 
-def extract_people_from_title(title, known_people, ignore_partial_names=False):
-    """Extract people mentioned in an event title.
-    
-    known_people entries can contain aliases: 'Niclas Nic' means both
-    'Niclas' and 'Nic' refer to the same person (displayed as 'Niclas').
+@functools.lru_cache(maxsize=8)
+def _compile_person_patterns(known_people_tuple):
+    """Compile one alternation regex per tracked person, covering aliases.
+
+    Cached on the (hashable) people tuple so the escape+compile work happens
+    once per settings change, not once per event row per alias; each title is
+    then matched with a single C-level scan per person.
     """
-    title_lower = title.lower()
-    found_people = []
-    
-    for person_entry in known_people:
+    patterns = []
+    for person_entry in known_people_tuple:
         primary_name, all_names = parse_person_entry(person_entry)
         if not primary_name:
             continue
-        
-        # Check if any of the names (primary or aliases) match
-        for name in all_names:
-            name_lower = name.lower()
-            pattern = r'\b' + re.escape(name_lower) + r'\b'
-            if re.search(pattern, title_lower):
-                # Use the full entry as the key (to keep aliases grouped)
-                if person_entry not in found_people:
-                    found_people.append(person_entry)
-                break  # Found a match for this person, no need to check other aliases
-    
-    # Filter out partial names if a longer name containing them is also found
-    if ignore_partial_names and len(found_people) > 1:
-        filtered_people = []
-        for person_entry in found_people:
-            _, all_names = parse_person_entry(person_entry)
-            # Check if any of this person's names is part of another found person's names
-            is_partial = False
-            for other_entry in found_people:
-                if person_entry == other_entry:
-                    continue
-                _, other_names = parse_person_entry(other_entry)
-                for name in all_names:
-                    name_lower = name.lower()
-                    for other_name in other_names:
-                        other_lower = other_name.lower()
-                        # Check if this name is a part of a multi-word other name
-                        if ' ' in other_entry.lower() and name_lower in other_entry.lower().split():
-                            is_partial = True
-                            break
-                    if is_partial:
-                        break
-                if is_partial:
-                    break
-            if not is_partial:
-                filtered_people.append(person_entry)
-        return filtered_people
-    
-    return found_people
+        joined = "|".join(re.escape(n.lower()) for n in all_names)
+        patterns.append((person_entry, re.compile(r"\b(?:" + joined + r")\b")))
+    return patterns
+
+def _partial_subsumers(person_entries):
+    """Map each person entry to the entries that subsume it.
+
+    Entry A is a partial name of entry B when B is multi-word and one of A's
+    names appears as a token of B — e.g. 'John' is partial of 'John Doe'.
+    Computed once per analysis instead of pairwise per matching title.
+    """
+    parsed = [(entry, [n.lower() for n in parse_person_entry(entry)[1]])
+              for entry in person_entries]
+    tokens_by_entry = {
+        entry: set(entry.lower().split()) if ' ' in entry else set()
+        for entry in person_entries
+    }
+    subsumers = {}
+    for entry, names in parsed:
+        subs = [other for other, tokens in tokens_by_entry.items()
+                if other != entry and tokens and any(n in tokens for n in names)]
+        if subs:
+            subsumers[entry] = subs
+    return subsumers
 
 def get_display_name(person_entry, include_aliases=False):
     """Get the display name from a person entry.
@@ -239,18 +269,14 @@ def get_display_name(person_entry, include_aliases=False):
     
     return primary
 
-def should_exclude(title, exclude_patterns):
-    """Check if an event should be excluded."""
-    if not isinstance(title, str):
-        return False  # Can't match patterns on non-string titles
-    title_lower = title.lower()
+def _exclude_mask(titles_lower, exclude_patterns):
+    """Mask of titles containing any exclude pattern (substring match)."""
+    mask = pd.Series(False, index=titles_lower.index)
     for pattern in exclude_patterns:
         pattern_lower = pattern.lower().strip()
-        if not pattern_lower:
-            continue
-        if pattern_lower in title_lower:
-            return True
-    return False
+        if pattern_lower:
+            mask |= titles_lower.str.contains(pattern_lower, regex=False)
+    return mask
 
 def format_gap(hours_val):
     """Format a time gap (given in hours) showing hours with days in parentheses, e.g. '55h (2.3 days)'."""
@@ -260,51 +286,67 @@ def format_gap(hours_val):
     return f"{round(hours_val)}h ({round(days_val, 1)} days)"
 
 def analyze_time_with_people(df, known_people, exclude_patterns, ignore_partial_names=False):
-    """Analyze time spent with each person."""
+    """Analyze time spent with each person.
+
+    One vectorized str.contains pass per tracked person replaces the old
+    iterrows loop, which boxed every row into Python objects and re-matched
+    every person against every title one at a time. Row dicts are only built
+    for the rows that actually matched someone.
+    """
     time_per_person = defaultdict(float)
     events_per_person = defaultdict(list)
-    
-    for _, row in df.iterrows():
-        title = row['title']
-        if not isinstance(title, str):
-            title = str(title) if pd.notna(title) else ""
-        duration = row['duration_hours']
-        
-        # Skip excluded events
-        if should_exclude(title, exclude_patterns):
+    if df.empty:
+        return time_per_person, events_per_person
+
+    titles = df['title'].fillna("").astype(str)
+    titles_lower = titles.str.lower()
+    keep = ~_exclude_mask(titles_lower, exclude_patterns)
+    df = df[keep]
+    titles = titles[keep]
+    titles_lower = titles_lower[keep]
+
+    person_patterns = _compile_person_patterns(tuple(known_people))
+    masks = {entry: titles_lower.str.contains(pattern).to_numpy()
+             for entry, pattern in person_patterns}
+    subsumers = _partial_subsumers([e for e, _ in person_patterns]) if ignore_partial_names else {}
+
+    for entry, _ in person_patterns:
+        mask = masks[entry]
+        for other in subsumers.get(entry, ()):
+            # A longer tracked name also matched these rows; they belong to
+            # the full name, not the partial one.
+            mask = mask & ~masks[other]
+        if not mask.any():
             continue
-        
-        people = extract_people_from_title(title, known_people, ignore_partial_names)
-        
-        for person in people:
-            time_per_person[person] += duration
-            events_per_person[person].append({
-                'title': title,
-                'date': row['start'],
-                'duration': duration,
-                'calendar': row.get('calendar', 'Unknown')
-            })
-    
+        sub = df[mask]
+        calendars = sub['calendar'] if 'calendar' in sub.columns else ['Unknown'] * len(sub)
+        time_per_person[entry] = float(sub['duration_hours'].sum())
+        events_per_person[entry] = [
+            {'title': t, 'date': s, 'duration': d, 'calendar': c}
+            for t, s, d, c in zip(titles[mask], sub['start'], sub['duration_hours'], calendars)
+        ]
+
     return time_per_person, events_per_person
 
+# Common separators for splitting titles into candidate words, compiled once.
+_TITLE_SPLIT_RE = re.compile(r'[\s,;:&+/]+')
+
 def find_potential_names(df, exclude_patterns, min_occurrences=2):
     """Find potential names in event titles."""
-    word_counts = defaultdict(int)
-    title_examples = defaultdict(list)
-    
-    for title in df['title']:
-        if should_exclude(title, exclude_patterns):
-            continue
-        
-        # Split on common separators
-        words = re.split(r'[\s,;:&+/]+', title)
-        for word in words:
-            word_clean = word.strip().lower()
+    word_counts = Counter()
+    title_examples = {}
+
+    titles = df['title'].fillna("").astype(str)
+    keep = ~_exclude_mask(titles.str.lower(), exclude_patterns)
+    for title in titles[keep].to_numpy():
+        for word in _TITLE_SPLIT_RE.split(title):
+            word_clean = word.lower()
             # Filter likely names (reasonable length, alphabetic)
             if len(word_clean) >= 2 and word_clean.isalpha():
                 word_counts[word_clean] += 1
-                if len(title_examples[word_clean]) < 3:
-                    title_examples[word_clean].append(title)
+                examples = title_examples.setdefault(word_clean, [])
+                if len(examples) < 3:
+                    examples.append(title)
     
     # Return words that appear multiple times
     potential = {word: {"count": count, "examples": title_examples[word]} 
@@ -412,8 +454,8 @@ else:
             events = load_events_from_cache(cal_config["url"], name)
             loaded_events.extend(events)
         if loaded_events:
-            st.session_state.loaded_events = loaded_events
-    
+            _set_loaded_events(loaded_events)
+
     col1, col2, col3 = st.columns([2, 1, 1])
     with col2:
         if selected_calendar_names and st.button("⚡ Quick Load selected", help="Load selected calendars instantly from local cache"):
@@ -424,7 +466,7 @@ else:
                 loaded_events.extend(events)
             
             if loaded_events:
-                st.session_state.loaded_events = loaded_events
+                _set_loaded_events(loaded_events)
                 st.success(f"Loaded {len(loaded_events)} events from cache")
             else:
                 st.warning("No cached data found. Click 'Sync Calendars' to fetch data.")
@@ -439,7 +481,7 @@ else:
                     loaded_events.extend(events)
                 
                 if loaded_events:
-                    st.session_state.loaded_events = loaded_events
+                    _set_loaded_events(loaded_events)
                     # Clear Streamlit cache so other pages see fresh data
                     st.cache_data.clear()
                     st.success(f"Synced {len(loaded_events)} events from {len(selected_calendar_names)} calendar(s)")
@@ -449,10 +491,11 @@ all_events = st.session_state.loaded_events
 
 # --- Analysis Section ---
 if all_events:
-    df = pd.DataFrame(all_events)
-    # Convert UTC timestamps to local time so date filtering, "Last Seen" and
-    # cadence match the other pages (which all normalize to local time).
-    df = normalize_time(df, tz="local")
+    df = st.session_state.get("loaded_events_df")
+    if df is None:
+        # Session predates the stored frame; build it once now.
+        _set_loaded_events(all_events)
+        df = st.session_state.loaded_events_df
 
     # Check for "Busy" events
     unique_titles = df['title'].unique()
@@ -473,12 +516,7 @@ if all_events:
         start_date, end_date = select_month_range(df)
 
         # Inclusive filter to capture events that start, end, or span the range
-        mask = (
-            ((df['start'].dt.date >= start_date) & (df['start'].dt.date <= end_date)) |
-            ((df['end'].dt.date >= start_date) & (df['end'].dt.date <= end_date)) |
-            ((df['start'].dt.date <= start_date) & (df['end'].dt.date >= end_date))
-        )
-        df_filtered = df[mask]
+        df_filtered = filter_date_range(df, start_date, end_date)
 
         st.info(f"Analyzing {len(df_filtered)} events from {start_date} to {end_date}")        
         # Get current settings
@@ -574,13 +612,15 @@ if all_events:
         potential_names = find_potential_names(df_filtered, exclude_patterns, min_occurrences)
         
         if potential_names:
-            # Build list of all known names including aliases
-            all_known_names_lower = []
-            for person_entry in known_people:
-                _, all_names = parse_person_entry(person_entry)
-                all_known_names_lower.extend([n.lower() for n in all_names])
-            
-            hidden_lower = [h.lower() for h in hide_from_discover]
+            # Build a set of all known names (including aliases) once, so the
+            # per-word membership tests below are hash lookups instead of
+            # list scans over re-lowercased entries.
+            all_known_names_lower = {
+                name.lower()
+                for person_entry in known_people
+                for name in parse_person_entry(person_entry)[1]
+            }
+            hidden_lower = {h.lower() for h in hide_from_discover}
             
             # Option to ignore partial names that are part of known full names
             hide_partial_names = st.checkbox(
@@ -589,14 +629,19 @@ if all_events:
                 help="Hide words that are part of a known person's name (e.g., hide 'John' if 'John Doe' is tracked)"
             )
             
+            # Tokens appearing inside some multi-word known name; a candidate
+            # word is a partial name iff it is in this set, turning the check
+            # into one hash probe instead of a scan over every known name.
+            multiword_tokens = {
+                token
+                for known in all_known_names_lower
+                if ' ' in known
+                for token in known.split()
+            }
+
             def is_partial_of_known(word):
                 """Check if word is a part of any known person's full name."""
-                word_lower = word.lower()
-                for known in all_known_names_lower:
-                    # Check if word is a part of a multi-word name (but not the full name itself)
-                    if ' ' in known and word_lower in known.split() and word_lower != known:
-                        return True
-                return False
+                return word.lower() in multiword_tokens
             
             new_potentials = {k: v for k, v in potential_names.items() 
                             if k.lower() not in all_known_names_lower 
@@ -651,7 +696,7 @@ if all_events:
         new_person = st.text_input("Add a person manually", placeholder="Enter name...")
         if new_person and st.button("Add", key="quick_add_btn"):
             new_person = new_person.strip()
-            if new_person and new_person.lower() not in [p.lower() for p in st.session_state.settings["known_people"]]:
+            if new_person and new_person.lower() not in {p.lower() for p in st.session_state.settings["known_people"]}:
                 st.session_state.settings["known_people"].append(new_person)
                 save_settings(st.session_state.settings)
                 st.success(f"Added: {new_person}")
@@ -663,16 +708,18 @@ if all_events:
         st.divider()
         st.subheader("📅 Sample Events")
         
-        # Filter out events that contain known people
-        def contains_known_person(title):
-            title_lower = title.lower()
-            for person in known_people:
-                person_lower = person.lower().strip()
-                if person_lower and re.search(r'\b' + re.escape(person_lower) + r'\b', title_lower):
-                    return True
-            return False
-        
-        sample_df = df_filtered[~df_filtered['title'].apply(contains_known_person)]
+        # Filter out events that contain known people; one combined regex
+        # compiled up front instead of escaping every entry per row.
+        known_clean = [p.lower().strip() for p in known_people if p.strip()]
+        known_person_pattern = re.compile(
+            "|".join(r"\b" + re.escape(p) + r"\b" for p in known_clean)
+        ) if known_clean else None
+
+        if known_person_pattern is not None:
+            sample_titles = df_filtered['title'].fillna("").astype(str).str.lower()
+            sample_df = df_filtered[~sample_titles.str.contains(known_person_pattern)]
+        else:
+            sample_df = df_filtered
         # Show unique titles only
         sample_events = sample_df.drop_duplicates(subset=['title'])[['title', 'start', 'duration_hours']].head(20)
         sample_events['start'] = sample_events['start'].dt.strftime('%Y-%m-%d')
@@ -1,5 +1,5 @@
 import streamlit as st
-from utils import load_all_events, load_all_events_from_cache, normalize_calendar_name, normalize_time
+from utils import load_all_events, load_all_events_from_cache, normalize_calendar_name, normalize_time, filter_date_range
 import pandas as pd
 import altair as alt
 import calendar
@@ -30,16 +30,16 @@ if force_refresh:
 else:
     with st.spinner("Loading calendar data from cache..."):
         all_events, source_type = load_all_events_from_cache()
-        if not all_events:
+        if all_events is None:
             with st.spinner("No cache found, fetching from URLs..."):
                 all_events, source_type = load_all_events()
 
-if not all_events:
+if all_events is None:
     st.warning("No events available.")
     st.stop()
 
 with st.spinner("Processing calendar data..."):
-    df = pd.DataFrame(all_events)
+    df = all_events.copy()
     df["calendar"] = df["calendar_name"].apply(normalize_calendar_name)
     df = normalize_time(df, tz="local")
 
@@ -144,11 +144,7 @@ if a_start > a_end or b_start > b_end:
 
 # --- Filter data for each period ---
 def filter_period(df, start, end):
-    return df[
-        ((df["start"].dt.date >= start) & (df["start"].dt.date <= end)) |
-        ((df["end"].dt.date >= start) & (df["end"].dt.date <= end)) |
-        ((df["start"].dt.date <= start) & (df["end"].dt.date >= end))
-    ]
+    return filter_date_range(df, start, end)
 
 
 df_a = filter_period(df, a_start, a_end)
@@ -1,5 +1,5 @@
 import streamlit as st
-from utils import load_all_events, load_all_events_from_cache, normalize_calendar_name, normalize_time, select_month_range
+from utils import load_all_events, load_all_events_from_cache, normalize_calendar_name, normalize_time, select_month_range, filter_date_range
 import pandas as pd
 import altair as alt
 from datetime import date
@@ -35,11 +35,11 @@ if force_refresh:
 else:
     with st.spinner("Loading calendar data from cache..."):
         all_events, source_type = load_all_events_from_cache()
-        if not all_events:
+        if all_events is None:
             with st.spinner("No cache found, fetching from URLs..."):
                 all_events, source_type = load_all_events()
 
-if not all_events:
+if all_events is None:
     st.warning("No events available.")
     st.stop()
 
@@ -47,7 +47,7 @@ if not all_events:
 st.session_state.trends_loaded = True
 
 with st.spinner("Processing calendar data..."):
-    df = pd.DataFrame(all_events)
+    df = all_events.copy()
     df["calendar"] = df["calendar_name"].apply(normalize_calendar_name)
     df = normalize_time(df, tz="local")
 
@@ -70,11 +70,7 @@ with st.spinner("Applying date filters..."):
     start_date, end_date = select_month_range(df)
 
     # Filter by date range
-    df = df[
-        ((df["start"].dt.date >= start_date) & (df["start"].dt.date <= end_date)) |
-        ((df["end"].dt.date >= start_date) & (df["end"].dt.date <= end_date)) |
-        ((df["start"].dt.date <= start_date) & (df["end"].dt.date >= end_date))
-    ]
+    df = filter_date_range(df, start_date, end_date)
 
 # --- Granularity selector ---
 granularity = st.radio("Time granularity:", ["Month", "Week"], horizontal=True)
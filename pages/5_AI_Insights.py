@@ -4,7 +4,7 @@ from openai import OpenAI
 import os
 import json
 from datetime import date, datetime
-from utils import load_all_events, load_all_events_from_cache, normalize_calendar_name, normalize_time, select_month_range
+from utils import load_all_events, load_all_events_from_cache, normalize_calendar_name, normalize_time, select_month_range, filter_date_range
 from dotenv import load_dotenv
 from ai_config_manager import load_ai_config, get_system_prompt, get_available_prompt_types, format_prompt_template
 
@@ -126,11 +126,11 @@ if force_refresh:
 else:
     with st.spinner("Loading calendar data from cache..."):
         all_events, source_type = load_all_events_from_cache()
-        if not all_events:
+        if all_events is None:
             with st.spinner("No cache found, fetching from URLs..."):
                 all_events, source_type = load_all_events()
 
-if not all_events:
+if all_events is None:
     st.warning("No events available to analyze.")
     st.stop()
 
@@ -161,7 +161,7 @@ time_group = st.radio(
 
 # --- Preprocess ---
 with st.spinner("Processing calendar data..."):
-    df = pd.DataFrame(all_events)
+    df = all_events.copy()
     df["calendar"] = df["calendar_name"].apply(normalize_calendar_name)
     df = normalize_time(df, tz="local")
     df["group"] = df[group_mode]
@@ -169,11 +169,7 @@ with st.spinner("Processing calendar data..."):
     start_date, end_date = select_month_range(df)
 
 # Filter range
-df = df[
-    ((df["start"].dt.date >= start_date) & (df["start"].dt.date <= end_date)) |
-    ((df["end"].dt.date >= start_date) & (df["end"].dt.date <= end_date)) |
-    ((df["start"].dt.date <= start_date) & (df["end"].dt.date >= end_date))
-]
+df = filter_date_range(df, start_date, end_date)
 
 # --- Add time grouping column ---
 if time_group == "day":
@@ -1,7 +1,6 @@
 import streamlit as st
 import pandas as pd
-from ics import Calendar
-from calendar_store import update_event_store, expand_event_occurrences
+from calendar_store import update_event_store, expand_event_occurrences, scan_ics_text
 from utils import load_calendar_urls
 import requests
 import os
@@ -11,6 +10,22 @@ st.set_page_config(page_title="Import ICS File", layout="wide")
 st.title("Import ICS File into Existing Calendar")
 
 # --- Load calendar URLs from calendars.txt ---
+def extract_wr_calname(content):
+    """Pull the X-WR-CALNAME value out of raw ICS text, or None if absent.
+
+    A single C-level find beats splitting the whole calendar into lines
+    just to locate (or rule out) one header.
+    """
+    idx = content.find("X-WR-CALNAME:")
+    while idx > 0 and content[idx - 1] != "\n":
+        idx = content.find("X-WR-CALNAME:", idx + 1)
+    if idx == -1:
+        return None
+    eol = content.find("\n", idx)
+    if eol == -1:
+        eol = len(content)
+    return content[idx + len("X-WR-CALNAME:"):eol].strip()
+
 def get_wr_calname(url):
     try:
         if url.startswith("file://"):
@@ -22,9 +37,9 @@ def get_wr_calname(url):
             response.raise_for_status()
             content = response.text
 
-        for line in content.splitlines():
-            if line.startswith("X-WR-CALNAME:"):
-                return line.replace("X-WR-CALNAME:", "").strip()
+        name = extract_wr_calname(content)
+        if name is not None:
+            return name
     except Exception as e:
         print(f"Could not read calendar name for {url}: {e}")
     return url  # fallback label
@@ -57,10 +72,9 @@ for calendar in https_calendars:
                 content = response.text
 
             # Attempt to extract calendar name from X-WR-CALNAME
-            for line in content.splitlines():
-                if line.startswith("X-WR-CALNAME:"):
-                    calendar_name = line.replace("X-WR-CALNAME:", "").strip()
-                    break
+            name = extract_wr_calname(content)
+            if name is not None:
+                calendar_name = name
         except Exception as e:
             st.warning(f"Could not retrieve name for {url}, using 'Unnamed'. Error: {e}")
             calendar_name = "Unnamed"  # Fallback to "Unnamed" if it fails
@@ -78,16 +92,16 @@ uploaded_file = st.file_uploader("Upload a .ics file", type=["ics"])
 if uploaded_file and target_url:
     try:
         content = uploaded_file.read().decode("utf-8")
-        cal = Calendar(content)
+        scanner = scan_ics_text(content)
 
         events = []
         # Extract name only (before first parenthesis)
         calendar_name = selected_label.split(" (")[0]
-        for event in cal.events:
+        for vevent in scanner.events:
             try:
-                name = event.name or "Untitled Event"
+                name = vevent["name"] or "Untitled Event"
                 # Expand recurring events into individual occurrences.
-                for start, end, occ_uid in expand_event_occurrences(event):
+                for start, end, occ_uid in expand_event_occurrences(vevent):
                     duration = (end - start).total_seconds() / 3600
                     events.append({
                         "calendar": f"[Imported] {calendar_name}",
@@ -0,0 +1,60 @@
+import unittest
+from datetime import timezone
+
+from calendar_store import scan_ics_text
+
+
+SIMPLE_EVENT = """BEGIN:VCALENDAR
+X-WR-CALNAME:Test Calendar
+BEGIN:VEVENT
+SUMMARY:Team meeting
+DTSTART:20240506T090000Z
+DTEND:20240506T100000Z
+UID:event-1@example.com
+END:VEVENT
+END:VCALENDAR
+"""
+
+# A VEVENT containing an email alarm, as emitted by Apple Calendar and
+# Outlook. The alarm carries its own SUMMARY/UID/DURATION, which must not
+# shadow the event's properties.
+EVENT_WITH_ALARM = """BEGIN:VCALENDAR
+BEGIN:VEVENT
+SUMMARY:Dentist appointment
+DTSTART:20240506T090000Z
+DTEND:20240506T100000Z
+UID:event-2@example.com
+BEGIN:VALARM
+ACTION:EMAIL
+SUMMARY:Alarm notification
+UID:alarm-1@example.com
+DURATION:PT15M
+END:VALARM
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+class ICSScannerTests(unittest.TestCase):
+    def test_parses_basic_event(self):
+        scanner = scan_ics_text(SIMPLE_EVENT)
+        self.assertEqual(scanner.calendar_name, "Test Calendar")
+        self.assertEqual(len(scanner.events), 1)
+        event = scanner.events[0]
+        self.assertEqual(event["name"], "Team meeting")
+        self.assertEqual(event["uid"], "event-1@example.com")
+        self.assertEqual(event["start"].tzinfo, timezone.utc)
+        self.assertEqual((event["end"] - event["start"]).total_seconds(), 3600)
+
+    def test_alarm_properties_do_not_shadow_event(self):
+        scanner = scan_ics_text(EVENT_WITH_ALARM)
+        self.assertEqual(len(scanner.events), 1)
+        event = scanner.events[0]
+        self.assertEqual(event["name"], "Dentist appointment")
+        self.assertEqual(event["uid"], "event-2@example.com")
+        # The alarm's DURATION must not override the event's DTEND either.
+        self.assertEqual((event["end"] - event["start"]).total_seconds(), 3600)
+
+
+if __name__ == "__main__":
+    unittest.main()